@@ -1,7 +1,10 @@
 from fastmcp import FastMCP
 import os
+import json
+import asyncio
 import aiosqlite  # Changed: sqlite3 → aiosqlite
 import tempfile
+from contextlib import asynccontextmanager, suppress
 # Use temporary directory which should be writable
 TEMP_DIR = tempfile.gettempdir()
 DB_PATH = os.path.join(TEMP_DIR, "expenses.db")
@@ -9,7 +12,126 @@ CATEGORIES_PATH = os.path.join(os.path.dirname(__file__), "categories.json")
 
 print(f"Database path: {DB_PATH}")
 
-mcp = FastMCP("ExpenseTracker")
+# Per-connection tuning; journal_mode=WAL is persistent and set once in init_db()
+_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+_INSERT_EXPENSE_SQL = (
+    "INSERT INTO expenses(date, amount, category, subcategory, note) VALUES (?,?,?,?,?)"
+)
+
+_LIST_EXPENSES_SQL = """
+    SELECT id, date, amount, category, subcategory, note
+    FROM expenses
+    WHERE date BETWEEN ? AND ?
+    ORDER BY date DESC, id DESC
+"""
+
+# summarize() has two filter shapes; keep both prebuilt so the SQL text is
+# identical across calls and always hits the statement cache
+_SUMMARIZE_SQL = """
+    SELECT category, SUM(amount) AS total_amount, COUNT(*) as count
+    FROM expenses
+    WHERE date BETWEEN ? AND ?
+    GROUP BY category ORDER BY total_amount DESC
+"""
+
+_SUMMARIZE_CATEGORY_SQL = """
+    SELECT category, SUM(amount) AS total_amount, COUNT(*) as count
+    FROM expenses
+    WHERE date BETWEEN ? AND ? AND category = ?
+    GROUP BY category ORDER BY total_amount DESC
+"""
+
+# One shared connection for all tools; aiosqlite funnels every call through a
+# single worker thread anyway, so the lock only keeps each tool's statements
+# (and its commit/rollback) from interleaving with another tool's.
+_conn = None
+_conn_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def get_conn():
+    global _conn
+    async with _conn_lock:
+        conn = _conn
+        if conn is None:
+            conn = await aiosqlite.connect(DB_PATH, cached_statements=256)
+            try:
+                conn.row_factory = aiosqlite.Row
+                for pragma in _PRAGMAS:
+                    await conn.execute(pragma)
+                # Refresh planner statistics once per long-lived connection, as
+                # SQLite recommends; cheap when nothing has changed
+                await conn.execute("PRAGMA optimize=0x10002")
+            except BaseException:
+                await conn.close()
+                raise
+            # Only publish a fully configured connection
+            _conn = conn
+        try:
+            yield conn
+        finally:
+            # Runs on cancellation too, so an interrupted tool never leaves an
+            # open write transaction (and its rows) on the shared connection
+            if conn.in_transaction:
+                try:
+                    await conn.rollback()
+                except Exception:
+                    # Don't let a failed rollback replace the tool's own error;
+                    # retire the connection instead, since closing it discards
+                    # the open transaction before the next call can commit it
+                    if _conn is conn:
+                        _conn = None
+                    with suppress(Exception):
+                        await conn.close()
+
+async def close_conn():
+    global _conn
+    # Detach without waiting on _conn_lock: this runs at shutdown, where an
+    # in-flight tool may hold the lock and this task may already be cancelled.
+    # aiosqlite's close() still stops its worker thread when cancelled.
+    conn, _conn = _conn, None
+    if conn is not None:
+        await conn.close()
+
+class ExpenseTrackerMCP(FastMCP):
+    """FastMCP server that closes the shared connection at server shutdown.
+
+    aiosqlite's worker thread is non-daemon, so the connection has to be closed
+    before the process can exit. FastMCP's own ``lifespan=`` hook runs once per
+    MCP session, which would reopen the connection for every session (and every
+    stateless HTTP request), so hook the server's run and ASGI app instead.
+    """
+
+    async def run_async(self, *args, **kwargs):
+        # `python main.py`, `fastmcp run`/`fastmcp dev`, any transport
+        try:
+            await super().run_async(*args, **kwargs)
+        finally:
+            await close_conn()
+
+    def http_app(self, *args, **kwargs):
+        # Hosts that import `mcp` and serve `mcp.http_app()` themselves
+        app = super().http_app(*args, **kwargs)
+        app_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(a):
+            try:
+                async with app_lifespan(a) as state:
+                    yield state
+            finally:
+                await close_conn()
+
+        app.router.lifespan_context = lifespan
+        return app
+
+mcp = ExpenseTrackerMCP("ExpenseTracker")
 
 def init_db():  # Keep as sync for initialization
     try:
@@ -27,6 +149,11 @@ def init_db():  # Keep as sync for initialization
                     note TEXT DEFAULT ''
                 )
             """)
+            c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)")
+            # Covering index for summarize(): a seek with a category filter, and a
+            # skip-scan over categories for the unfiltered summary once ANALYZE
+            # statistics exist
+            c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category_date_amount ON expenses(category, date, amount)")
             # Test write access
             c.execute("INSERT OR IGNORE INTO expenses(date, amount, category) VALUES ('2000-01-01', 0, 'test')")
             c.execute("DELETE FROM expenses WHERE category = 'test'")
@@ -42,9 +169,9 @@ init_db()
 async def add_expense(date, amount, category, subcategory="", note=""):  # Changed: added async
     '''Add a new expense entry to the database.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
+        async with get_conn() as c:
             cur = await c.execute(  # Changed: added await
-                "INSERT INTO expenses(date, amount, category, subcategory, note) VALUES (?,?,?,?,?)",
+                _INSERT_EXPENSE_SQL,
                 (date, amount, category, subcategory, note)
             )
             expense_id = cur.lastrowid
@@ -59,18 +186,9 @@ async def add_expense(date, amount, category, subcategory="", note=""):  # Chang
 async def list_expenses(start_date, end_date):  # Changed: added async
     '''List expense entries within an inclusive date range.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            cur = await c.execute(  # Changed: added await
-                """
-                SELECT id, date, amount, category, subcategory, note
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date DESC, id DESC
-                """,
-                (start_date, end_date)
-            )
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in await cur.fetchall()]  # Changed: added await
+        async with get_conn() as c:
+            rows = await c.execute_fetchall(_LIST_EXPENSES_SQL, (start_date, end_date))
+            return [dict(r) for r in rows]
     except Exception as e:
         return {"status": "error", "message": f"Error listing expenses: {str(e)}"}
 
@@ -78,51 +196,54 @@ async def list_expenses(start_date, end_date):  # Changed: added async
 async def summarize(start_date, end_date, category=None):  # Changed: added async
     '''Summarize expenses by category within an inclusive date range.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            query = """
-                SELECT category, SUM(amount) AS total_amount, COUNT(*) as count
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-            """
-            params = [start_date, end_date]
-
+        async with get_conn() as c:
             if category:
-                query += " AND category = ?"
-                params.append(category)
-
-            query += " GROUP BY category ORDER BY total_amount DESC"
-
-            cur = await c.execute(query, params)  # Changed: added await
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in await cur.fetchall()]  # Changed: added await
+                rows = await c.execute_fetchall(
+                    _SUMMARIZE_CATEGORY_SQL, (start_date, end_date, category)
+                )
+            else:
+                rows = await c.execute_fetchall(_SUMMARIZE_SQL, (start_date, end_date))
+            return [dict(r) for r in rows]
     except Exception as e:
         return {"status": "error", "message": f"Error summarizing expenses: {str(e)}"}
 
+DEFAULT_CATEGORIES = {
+    "categories": [
+        "Food & Dining",
+        "Transportation",
+        "Shopping",
+        "Entertainment",
+        "Bills & Utilities",
+        "Healthcare",
+        "Travel",
+        "Education",
+        "Business",
+        "Other"
+    ]
+}
+
+# Serialized categories payload, keyed by the file's (mtime, size) so edits
+# to categories.json are picked up without re-reading it on every request
+_categories_cache = {"ver": None, "payload": None}
+
 @mcp.resource("expense:///categories", mime_type="application/json")  # Changed: expense:// → expense:///
 def categories():
     try:
-        # Provide default categories if file doesn't exist
-        default_categories = {
-            "categories": [
-                "Food & Dining",
-                "Transportation",
-                "Shopping",
-                "Entertainment",
-                "Bills & Utilities",
-                "Healthcare",
-                "Travel",
-                "Education",
-                "Business",
-                "Other"
-            ]
-        }
-        
         try:
-            with open(CATEGORIES_PATH, "r", encoding="utf-8") as f:
-                return f.read()
+            st = os.stat(CATEGORIES_PATH)
+            ver = (st.st_mtime_ns, st.st_size)
         except FileNotFoundError:
-            import json
-            return json.dumps(default_categories, indent=2)
+            ver = None
+
+        if _categories_cache["payload"] is None or _categories_cache["ver"] != ver:
+            if ver is None:
+                # Provide default categories if file doesn't exist
+                payload = json.dumps(DEFAULT_CATEGORIES, indent=2)
+            else:
+                with open(CATEGORIES_PATH, "r", encoding="utf-8") as f:
+                    payload = f.read()
+            _categories_cache.update(ver=ver, payload=payload)
+        return _categories_cache["payload"]
     except Exception as e:
         return f'{{"error": "Could not load categories: {str(e)}"}}'
 